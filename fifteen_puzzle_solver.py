@@ -1,152 +1,577 @@
-import heapq
-
-class PuzzleNode:
-    def __init__(self, state, parent=None, move=None, g_cost=0, goal_state_map=None):
-        self.state = state  # (tuple of tuples)
-        self.parent = parent
-        self.move = move # (dr, dc) or a description
-        self.g_cost = g_cost # Cost from start
-        self._goal_state_map = goal_state_map # Precomputed map of tile -> (r, c) for goal
-        self.h_cost = self._calculate_manhattan_distance()
-        self.f_cost = self.g_cost + self.h_cost
-        self.empty_tiles_pos = self._find_empty_tiles()
-
-    def _find_empty_tiles(self):
-        empty_tiles = []
-        for r in range(4):
-            for c in range(4):
-                if self.state[r][c] == 0: # 0 represents an empty tile
-                    empty_tiles.append((r, c))
-        return empty_tiles
-
-    def _calculate_manhattan_distance(self):
-        if self._goal_state_map is None:
-            return 0
-            
-        distance = 0
-        for r in range(4):
-            for c in range(4):
-                tile_value = self.state[r][c]
-                if tile_value != 0: # Don't count the empty tiles
-                    if tile_value in self._goal_state_map: # Ensure the tile is in the goal map
-                        goal_r, goal_c = self._goal_state_map[tile_value]
-                        distance += abs(r - goal_r) + abs(c - goal_c)
-        return distance
-
-    def get_neighbors(self):
-        neighbors = []
-        # Moves: (dr, dc) -> Right, Left, Down, Up
-        possible_moves_offsets = [(0, 1), (0, -1), (1, 0), (-1, 0)] 
-
-        for empty_idx, (r, c) in enumerate(self.empty_tiles_pos):
-            # For each empty tile, try moving an adjacent numbered tile into it
-            for dr_tile, dc_tile in possible_moves_offsets:
-                nr_tile, nc_tile = r + dr_tile, c + dc_tile
-
-                if 0 <= nr_tile < 4 and 0 <= nc_tile < 4: # Check bounds for the numbered tile
-                    # Ensure we are not trying to swap an empty tile with another empty tile
-                    # Although the logic is to move a numbered tile *into* an empty slot,
-                    # nr_tile, nc_tile is the position of the tile *to be moved*.
-                    # This tile must not be an empty one.
-                    if self.state[nr_tile][nc_tile] == 0:
+import os
+import random
+import sys
+from collections import deque
+from itertools import permutations
+from typing import Dict, Final, Iterator, List, Optional, Sequence, Tuple
+
+# The annotations let the module be compiled to a C extension with mypyc (see README);
+# uncompiled, it runs as plain Python.
+Board = Tuple[Tuple[int, ...], ...] # Rows of tile values, 0 for an empty tile
+GoalMap = Dict[int, Tuple[int, int]] # tile -> (r, c) in the goal
+PatternDBs = Tuple[Dict[int, Tuple[int, int]], List[bytearray]] # See build_pattern_databases
+WalkingDistance = Tuple[List[int], List[int], Dict[int, int], Dict[int, int]] # See build_walking_distance
+
+FOUND: Final = -1 # Sentinel returned by the IDA* depth-first search once the goal is reached
+INF: Final = 1 << 30 # Larger than any reachable f-cost
+
+# NEIGHBORS[i]: flat indices of the cells adjacent to cell i, in Right, Left, Down, Up order
+NEIGHBORS: Final[Tuple[Tuple[int, ...], ...]] = tuple(
+    tuple(nr * 4 + nc
+          for nr, nc in ((i // 4, i % 4 + 1), (i // 4, i % 4 - 1), (i // 4 + 1, i % 4), (i // 4 - 1, i % 4))
+          if 0 <= nr < 4 and 0 <= nc < 4)
+    for i in range(16))
+
+# LINES[k]: flat indices of row k (k < 4) or of column k - 4 (k >= 4)
+LINES: Final[Tuple[Tuple[int, ...], ...]] = tuple(tuple(k * 4 + i for i in range(4)) for k in range(4)) + \
+        tuple(tuple(i * 4 + k for i in range(4)) for k in range(4))
+
+def _longest_increasing_run(seq: Tuple[int, ...]) -> int:
+    # Length of the longest increasing subsequence (seq has at most 4 items)
+    best: List[int] = []
+    for i, value in enumerate(seq):
+        best.append(1 + max((best[j] for j in range(i) if seq[j] < value), default=0))
+    return max(best, default=0)
+
+# LINE_CONFLICT_COST[goal_coords]: extra moves forced by the tiles of one line that also
+# belong to that line in the goal, given their goal coordinates along the line in their
+# current order. Tiles in a line cannot pass each other, so every tile outside the longest
+# correctly ordered subsequence has to step out of the line and back: 2 moves each.
+LINE_CONFLICT_COST: Final[Dict[Tuple[int, ...], int]] = {seq: 2 * (len(seq) - _longest_increasing_run(seq))
+                      for n in range(5) for seq in permutations(range(4), n)}
+
+# Instances whose Manhattan distance is at most BIDIRECTIONAL_MAX_ESTIMATE are first tried
+# with bidirectional_bfs, which gives up (and IDA* takes over) beyond BIDIRECTIONAL_MAX_STATES.
+# This only pays off while the goal's pattern databases still have to be built: once they are
+# in memory or saved in PDB_CACHE_DIR, IDA* solves these instances with far fewer
+# expansions, so the BFS is skipped (see pattern_databases_ready).
+BIDIRECTIONAL_MAX_ESTIMATE = 20
+BIDIRECTIONAL_MAX_STATES = 1000000
+
+# IDA* transposition table: 1 << TT_SIZE_BITS entries, indexed by the low bits of a
+# Zobrist key. A state's hash is the XOR of ZOBRIST_KEYS[tile_value * 16 + idx] over its
+# tiles, so a move updates it with two XORs. The search never undoes the move that
+# reached a node, so the node's key also mixes in ZOBRIST_MOVE_KEYS[from_idx * 16 + to_idx].
+# solver_numba.solve is given these keys and the table size, so both searches agree.
+TT_SIZE_BITS: Final = 20
+ZOBRIST_SEED: Final = 14
+_zobrist_random = random.Random(ZOBRIST_SEED)
+ZOBRIST_KEYS: Final = [_zobrist_random.getrandbits(64) for _ in range(256)]
+ZOBRIST_MOVE_KEYS: Final = [_zobrist_random.getrandbits(64) for _ in range(256)]
+
+PDB_GROUP_SIZE: Final = 5 # Tiles per pattern database: 5-5-4 for the 14 tiles
+PDB_CACHE_DIR: Final = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdb_cache')
+PDB_UNSEEN: Final = 255
+
+# Pattern databases by goal, shared by every solve in this process (see build_pattern_databases)
+_PATTERN_DB_CACHE: Dict[Tuple[Tuple[int, Tuple[int, int]], ...], PatternDBs] = {}
+
+# Walking distance tables by number of tiles per goal line (see walking_distance_table)
+_WALKING_DISTANCE_CACHE: Dict[Tuple[int, ...], Dict[int, int]] = {}
+
+def build_pdb(pattern_tiles: Sequence[int], goal_state_map: GoalMap) -> bytearray:
+    # Exact distances in an abstract puzzle where only the pattern tiles exist and every
+    # other cell is free, found by a BFS backwards from the goal. Only pattern-tile moves
+    # are counted, so the databases of disjoint groups can be added and stay admissible.
+    # The table is indexed by the packed positions of the pattern tiles: tile k of the
+    # pattern at flat index p contributes p << 4k.
+    n = len(pattern_tiles)
+    pdb = bytearray([PDB_UNSEEN]) * (16 ** n)
+    goal_index = 0
+    for k, tile_value in enumerate(pattern_tiles):
+        goal_r, goal_c = goal_state_map[tile_value]
+        goal_index |= (goal_r * 4 + goal_c) << (4 * k)
+    pdb[goal_index] = 0
+
+    queue = deque([goal_index])
+    while queue:
+        index = queue.popleft()
+        distance = pdb[index] + 1
+        positions = [(index >> (4 * k)) & 0xF for k in range(n)]
+        for k, pos in enumerate(positions):
+            for next_pos in NEIGHBORS[pos]:
+                if next_pos in positions: # Blocked by another pattern tile
+                    continue
+                next_index = index + ((next_pos - pos) << (4 * k))
+                if pdb[next_index] == PDB_UNSEEN:
+                    pdb[next_index] = distance
+                    queue.append(next_index)
+    return pdb
+
+def pdb_path(pattern_tiles: Sequence[int], goal_state_map: GoalMap) -> str:
+    # A pattern database only depends on the goal cells of its tiles, so it is saved
+    # under that key in PDB_CACHE_DIR and reused by later runs.
+    goal_cells = [r * 4 + c for r, c in (goal_state_map[tile_value] for tile_value in pattern_tiles)]
+    return os.path.join(PDB_CACHE_DIR, 'pdb_%s.bin' % ''.join('%x' % cell for cell in goal_cells))
+
+def load_pdb(pattern_tiles: Sequence[int], goal_state_map: GoalMap) -> bytearray:
+    path = pdb_path(pattern_tiles, goal_state_map)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            pdb = bytearray(f.read())
+        if len(pdb) == 16 ** len(pattern_tiles):
+            return pdb
+
+    pdb = build_pdb(pattern_tiles, goal_state_map)
+    try:
+        os.makedirs(PDB_CACHE_DIR, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(pdb)
+    except OSError: # The cache is only an optimization
+        pass
+    return pdb
+
+def _pattern_db_key(goal_state_map: GoalMap) -> Tuple[Tuple[int, Tuple[int, int]], ...]:
+    return tuple(sorted(goal_state_map.items()))
+
+def _pattern_groups(goal_state_map: GoalMap) -> List[List[int]]:
+    # The tiles ordered by goal cell, split into disjoint groups of PDB_GROUP_SIZE
+    tiles = sorted(goal_state_map, key=lambda tile_value: goal_state_map[tile_value])
+    return [tiles[i:i + PDB_GROUP_SIZE] for i in range(0, len(tiles), PDB_GROUP_SIZE)]
+
+def pattern_databases_ready(goal_state_map: GoalMap) -> bool:
+    # True if build_pattern_databases is cheap for this goal: its databases are already
+    # in memory, or every one of them is saved in PDB_CACHE_DIR
+    return (_pattern_db_key(goal_state_map) in _PATTERN_DB_CACHE or
+            all(os.path.exists(pdb_path(group, goal_state_map)) for group in _pattern_groups(goal_state_map)))
+
+def build_pattern_databases(goal_state_map: GoalMap) -> PatternDBs:
+    # Splits the tiles, ordered by goal cell, into disjoint groups of PDB_GROUP_SIZE.
+    # Returns (tile_slots, pdbs): tile_slots maps tile -> (group index, bit shift
+    # of the tile inside that group's table index). The result only depends on the
+    # goal, so it is computed once per goal and reused by later solves.
+    goal_key = _pattern_db_key(goal_state_map)
+    if goal_key not in _PATTERN_DB_CACHE:
+        groups = _pattern_groups(goal_state_map)
+        tile_slots = {tile_value: (group_idx, 4 * k)
+                      for group_idx, group in enumerate(groups) for k, tile_value in enumerate(group)}
+        _PATTERN_DB_CACHE[goal_key] = (tile_slots, [load_pdb(group, goal_state_map) for group in groups])
+    return _PATTERN_DB_CACHE[goal_key]
+
+def walking_distance_table(goal_counts: Tuple[int, ...]) -> Dict[int, int]:
+    # Walking distance (vertical part): a state only records how many tiles of each goal
+    # row are in each row, as 3-bit counts where bits 3 * (4 * row + goal_row) hold the
+    # count. Every cell of a row not taken by a tile is empty, and a move takes any tile
+    # to an adjacent row with an empty cell. A BFS from the goal, where goal row i holds
+    # goal_counts[i] tiles, gives the exact number of vertical moves in that abstraction.
+    # The horizontal part is the same table applied to columns.
+    if goal_counts not in _WALKING_DISTANCE_CACHE:
+        goal_key = 0
+        for line_idx, count in enumerate(goal_counts):
+            goal_key += count << (3 * (4 * line_idx + line_idx))
+        table = {goal_key: 0}
+        queue = deque([goal_key])
+        while queue:
+            key = queue.popleft()
+            distance = table[key] + 1
+            counts = [(key >> (3 * k)) & 7 for k in range(16)]
+            for line_idx in range(4):
+                if sum(counts[4 * line_idx:4 * line_idx + 4]) == 4: # No empty cell to move into
+                    continue
+                for from_line in (line_idx - 1, line_idx + 1):
+                    if not 0 <= from_line < 4:
                         continue
+                    for goal_line in range(4):
+                        if counts[4 * from_line + goal_line] != 0:
+                            next_key = key - (1 << (3 * (4 * from_line + goal_line))) + (1 << (3 * (4 * line_idx + goal_line)))
+                            if next_key not in table:
+                                table[next_key] = distance
+                                queue.append(next_key)
+        _WALKING_DISTANCE_CACHE[goal_counts] = table
+    return _WALKING_DISTANCE_CACHE[goal_counts]
+
+def build_walking_distance(goal_state_map: GoalMap) -> WalkingDistance:
+    # Returns (row_units, col_units, row_table, col_table). row_units[tile_value * 16 + idx]
+    # is what the tile on cell idx adds to the row key of walking_distance_table (0 for the
+    # empty tiles), so a state's key is a sum over its cells and a move changes it by
+    # row_units[tile at new cell] - row_units[tile at old cell]; col_units likewise.
+    row_units = [0] * 256
+    col_units = [0] * 256
+    for tile_value, (goal_r, goal_c) in goal_state_map.items():
+        for idx in range(16):
+            row_units[tile_value * 16 + idx] = 1 << (3 * (4 * (idx // 4) + goal_r))
+            col_units[tile_value * 16 + idx] = 1 << (3 * (4 * (idx % 4) + goal_c))
+    goal_rows = tuple(sum(1 for goal_r, _ in goal_state_map.values() if goal_r == line_idx) for line_idx in range(4))
+    goal_cols = tuple(sum(1 for _, goal_c in goal_state_map.values() if goal_c == line_idx) for line_idx in range(4))
+    return row_units, col_units, walking_distance_table(goal_rows), walking_distance_table(goal_cols)
+
+def pack_state(state_tuple: Sequence[Sequence[int]]) -> int:
+    # 4 bits per tile: the tile at flat index i = r * 4 + c lives in bits 4i..4i+3
+    packed = 0
+    for i, tile_value in enumerate(tile for row in state_tuple for tile in row):
+        packed |= tile_value << (4 * i)
+    return packed
+
+def unpack_state(packed_state: int) -> Board:
+    return tuple(tuple((packed_state >> (4 * (r * 4 + c))) & 0xF for c in range(4)) for r in range(4))
+
+def build_manhattan_table(goal_state_map: GoalMap) -> List[int]:
+    # table[tile_value * 16 + idx]: Manhattan distance of the tile on cell idx to its
+    # goal cell; 0 for the empty tiles, so they need no special case
+    table = [0] * 256
+    for tile_value, (goal_r, goal_c) in goal_state_map.items():
+        for idx in range(16):
+            table[tile_value * 16 + idx] = abs(idx // 4 - goal_r) + abs(idx % 4 - goal_c)
+    return table
+
+def calculate_manhattan_distance(state: int, manhattan_table: List[int]) -> int:
+    distance = 0
+    for idx in range(16):
+        distance += manhattan_table[((state >> (4 * idx)) & 0xF) * 16 + idx]
+    return distance
 
-                    new_state_list = [list(row) for row in self.state]
-                    
-                    # The numbered tile at (nr_tile, nc_tile) moves to the empty slot at (r,c)
-                    new_state_list[r][c] = self.state[nr_tile][nc_tile]
-                    # The original position of the numbered tile (nr_tile, nc_tile) becomes empty
-                    new_state_list[nr_tile][nc_tile] = 0
-                    
-                    new_state_tuple = tuple(tuple(row) for row in new_state_list)
-                    
-                    # Create the new node
-                    # The move description could be more sophisticated, e.g., (tile_value, (dr, dc))
-                    neighbors.append(PuzzleNode(new_state_tuple, parent=self, move=(dr_tile, dc_tile), g_cost=self.g_cost + 1, goal_state_map=self._goal_state_map))
-        return neighbors
-
-    # For priority queue comparison (heapq is a min-heap)
-    def __lt__(self, other):
-        if self.f_cost == other.f_cost:
-            return self.h_cost < other.h_cost # Tie-breaking: prefer smaller h_cost
-        return self.f_cost < other.f_cost
-
-    # For visited set (to store states in a set or as dict keys)
-    def __hash__(self):
-        return hash(self.state)
-
-    def __eq__(self, other):
-        return isinstance(other, PuzzleNode) and self.state == other.state
-
-def solve_15_puzzle(initial_state_list, goal_state_list): # Renaming to solve_puzzle might be better
+def calculate_line_conflict(board: bytearray, line_idx: int, goal_state_map: GoalMap) -> int:
+    # Linear conflict cost of row line_idx (< 4) or column line_idx - 4 (>= 4);
+    # board holds the 16 tile values in row-major order
+    goal_coords: List[int] = []
+    for idx in LINES[line_idx]:
+        tile_value = board[idx]
+        if tile_value != 0:
+            goal_r, goal_c = goal_state_map[tile_value]
+            if line_idx < 4 and goal_r == line_idx:
+                goal_coords.append(goal_c)
+            elif line_idx >= 4 and goal_c == line_idx - 4:
+                goal_coords.append(goal_r)
+    return LINE_CONFLICT_COST[tuple(goal_coords)]
+
+def calculate_pdb_indices(state: int, tile_slots: Dict[int, Tuple[int, int]], n_groups: int) -> List[int]:
+    # Table index of every pattern database, see build_pdb
+    pdb_indices = [0] * n_groups
+    for idx in range(16):
+        tile_value = (state >> (4 * idx)) & 0xF
+        if tile_value != 0:
+            group_idx, shift = tile_slots[tile_value]
+            pdb_indices[group_idx] |= idx << shift
+    return pdb_indices
+
+def ida_star(start_state: int, goal_state_map: GoalMap, pattern_dbs: PatternDBs,
+             walking_distance: WalkingDistance) -> Tuple[Optional[List[int]], int]:
+    # Iterative Deepening A*: repeated depth-first searches bounded by f = g + h.
+    # Only the current path is kept in memory, so no open/closed sets are needed.
+    # The path is stored as parallel per-depth lists (g is the depth itself) rather
+    # than node objects. A single mutable board is shared by the whole search: each
+    # move writes two bytes and backtracking writes them back, and the per-line
+    # conflicts, pattern database indices and empty tiles are restored the same way.
+    # h = max(Manhattan + linear conflict, sum of the pattern databases, walking
+    # distance): all three are admissible, so their maximum is too.
+    # A searched subtree that did not reach the goal proves that the node is at least
+    # min_exceeding_f - depth moves away from it. The transposition table keeps that
+    # bound across branches and iterations, and raises h when the node (reached by the
+    # same move) is met again through another move order. The table has a fixed size
+    # and every store overwrites its slot.
+    tile_slots, pdbs = pattern_dbs
+    row_units, col_units, row_table, col_table = walking_distance
+    tt_mask = (1 << TT_SIZE_BITS) - 1
+    tt_keys = [0] * (1 << TT_SIZE_BITS)
+    tt_bounds = bytearray(1 << TT_SIZE_BITS)
+    manhattan_table = build_manhattan_table(goal_state_map)
+    board = bytearray((start_state >> (4 * idx)) & 0xF for idx in range(16))
+    moves = [(-1, -1)] # moves[d]: (from_idx, to_idx) of the move that reached depth d (none at the root)
+    line_conflicts = [calculate_line_conflict(board, line_idx, goal_state_map) for line_idx in range(8)]
+    mdlc_costs = [calculate_manhattan_distance(start_state, manhattan_table) + sum(line_conflicts)]
+    pdb_indices = calculate_pdb_indices(start_state, tile_slots, len(pdbs))
+    pdb_costs = [sum(pdb[index] for pdb, index in zip(pdbs, pdb_indices))]
+    row_keys = [sum(row_units[board[idx] * 16 + idx] for idx in range(16))] # row_keys[d]: see build_walking_distance
+    col_keys = [sum(col_units[board[idx] * 16 + idx] for idx in range(16))]
+    wd_costs = [row_table[row_keys[0]] + col_table[col_keys[0]]]
+    empty_tiles = [idx for idx in range(16) if board[idx] == 0] # Ascending
+    state_hash = 0
+    for idx in range(16):
+        if board[idx] != 0:
+            state_hash ^= ZOBRIST_KEYS[board[idx] * 16 + idx]
+    state_hashes = [state_hash] # state_hashes[d]: Zobrist hash of the state at depth d
+    node_keys = [state_hash] # node_keys[d]: its transposition table key
+    nodes_expanded_count = 0
+
+    def dfs(depth: int, bound: int) -> int:
+        nonlocal nodes_expanded_count
+        h_cost = max(mdlc_costs[depth], pdb_costs[depth], wd_costs[depth])
+        node_key = node_keys[depth]
+        slot = node_key & tt_mask
+        if tt_keys[slot] == node_key and tt_bounds[slot] > h_cost:
+            h_cost = tt_bounds[slot]
+        if depth + h_cost > bound:
+            return depth + h_cost
+        if h_cost == 0: # Every tile is on its goal cell
+            return FOUND
+
+        nodes_expanded_count += 1
+        # Never undo the move that led here (prunes 180-degree backtracking)
+        undo_to, undo_from = moves[depth]
+        min_exceeding_f = INF
+        for empty_idx in tuple(empty_tiles):
+            # For each empty tile, try moving an adjacent numbered tile into it
+            for tile_idx in NEIGHBORS[empty_idx]:
+                if tile_idx == undo_from and empty_idx == undo_to:
+                    continue
+                tile_value = board[tile_idx]
+                if tile_value == 0: # The other empty tile
+                    continue
+                board[empty_idx] = tile_value
+                board[tile_idx] = 0
+
+                # A move only changes one tile's position, so the Manhattan distance is
+                # corrected in O(1). A horizontal move keeps the order of tiles in every
+                # row and only changes the two columns involved (vertical: two rows).
+                child_mdlc = (mdlc_costs[depth] - manhattan_table[tile_value * 16 + tile_idx]
+                              + manhattan_table[tile_value * 16 + empty_idx])
+                if tile_idx // 4 == empty_idx // 4:
+                    changed_lines = (4 + tile_idx % 4, 4 + empty_idx % 4)
+                else:
+                    changed_lines = (tile_idx // 4, empty_idx // 4)
+                saved_conflicts = [line_conflicts[line_idx] for line_idx in changed_lines]
+                for line_idx in changed_lines:
+                    line_conflicts[line_idx] = calculate_line_conflict(board, line_idx, goal_state_map)
+                    child_mdlc += line_conflicts[line_idx]
+                child_mdlc -= sum(saved_conflicts)
+
+                # Only the moved tile's pattern database changes
+                group_idx, shift = tile_slots[tile_value]
+                pdb = pdbs[group_idx]
+                saved_index = pdb_indices[group_idx]
+                pdb_indices[group_idx] += (empty_idx - tile_idx) << shift
+                child_pdb = pdb_costs[depth] - pdb[saved_index] + pdb[pdb_indices[group_idx]]
+
+                # A vertical move only changes the row key, a horizontal one the column key
+                child_row_key = row_keys[depth] + row_units[tile_value * 16 + empty_idx] - row_units[tile_value * 16 + tile_idx]
+                child_col_key = col_keys[depth] + col_units[tile_value * 16 + empty_idx] - col_units[tile_value * 16 + tile_idx]
+
+                empty_tiles[empty_tiles.index(empty_idx)] = tile_idx
+                empty_tiles.sort()
+                child_hash = (state_hashes[depth] ^ ZOBRIST_KEYS[tile_value * 16 + tile_idx]
+                              ^ ZOBRIST_KEYS[tile_value * 16 + empty_idx])
+                state_hashes.append(child_hash)
+                node_keys.append(child_hash ^ ZOBRIST_MOVE_KEYS[tile_idx * 16 + empty_idx])
+                moves.append((tile_idx, empty_idx))
+                mdlc_costs.append(child_mdlc)
+                pdb_costs.append(child_pdb)
+                row_keys.append(child_row_key)
+                col_keys.append(child_col_key)
+                wd_costs.append(row_table[child_row_key] + col_table[child_col_key])
+
+                t = dfs(depth + 1, bound)
+                if t == FOUND:
+                    return FOUND
+
+                board[tile_idx] = tile_value
+                board[empty_idx] = 0
+                state_hashes.pop()
+                node_keys.pop()
+                moves.pop()
+                mdlc_costs.pop()
+                pdb_costs.pop()
+                row_keys.pop()
+                col_keys.pop()
+                wd_costs.pop()
+                empty_tiles[empty_tiles.index(tile_idx)] = empty_idx
+                empty_tiles.sort()
+                pdb_indices[group_idx] = saved_index
+                for line_idx, conflict in zip(changed_lines, saved_conflicts):
+                    line_conflicts[line_idx] = conflict
+                if t < min_exceeding_f:
+                    min_exceeding_f = t
+        if min_exceeding_f < INF:
+            tt_keys[slot] = node_key
+            tt_bounds[slot] = min(min_exceeding_f - depth, 255)
+        return min_exceeding_f
+
+    threshold = max(mdlc_costs[0], pdb_costs[0], wd_costs[0])
+    while True:
+        t = dfs(0, threshold)
+        if t == FOUND:
+            # Replay the moves from the start to list the states along the path
+            states = [start_state]
+            for from_idx, to_idx in moves[1:]:
+                tile_value = (states[-1] >> (4 * from_idx)) & 0xF
+                states.append((states[-1] & ~(0xF << (4 * from_idx))) | (tile_value << (4 * to_idx)))
+            return states, nodes_expanded_count
+        if t == INF:
+            return None, nodes_expanded_count
+        threshold = t # Smallest f that exceeded the previous threshold
+
+def _successor_states(state: int) -> Iterator[int]:
+    # Every packed state one move away from state (moves are reversible)
+    for empty_idx in range(16):
+        if (state >> (4 * empty_idx)) & 0xF != 0:
+            continue
+        for tile_idx in NEIGHBORS[empty_idx]:
+            tile_value = (state >> (4 * tile_idx)) & 0xF
+            if tile_value != 0:
+                yield (state & ~(0xF << (4 * tile_idx))) | (tile_value << (4 * empty_idx))
+
+def bidirectional_bfs(start_state: int, goal_state: int,
+                      max_states: int = BIDIRECTIONAL_MAX_STATES) -> Tuple[Optional[List[int]], int]:
+    # Breadth-first search from both ends that stops where the two searches meet, so
+    # each side only goes about half the solution depth deep (~b^(d/2) states instead
+    # of b^d). Whole layers are expanded at a time, always on the side with the smaller
+    # frontier; the first layer that reaches a state seen by the other side yields a
+    # shortest path. Returns (path_states, nodes_expanded), or (None, nodes_expanded)
+    # once more than max_states states have been seen.
+    forward_parents: Dict[int, Optional[int]] = {start_state: None}
+    backward_parents: Dict[int, Optional[int]] = {goal_state: None}
+    parents = (forward_parents, backward_parents)
+    frontiers = ([start_state], [goal_state])
+    nodes_expanded_count = 0
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        visited, other_visited = parents[side], parents[1 - side]
+        next_frontier: List[int] = []
+        for state in frontiers[side]:
+            nodes_expanded_count += 1
+            for child_state in _successor_states(state):
+                if child_state in visited:
+                    continue
+                visited[child_state] = state
+                if child_state in other_visited:
+                    # Splice: start -> meeting state via the forward parents, then on to
+                    # the goal via the backward parents
+                    path_states: List[int] = []
+                    meet: Optional[int] = child_state
+                    while meet is not None:
+                        path_states.append(meet)
+                        meet = parents[0][meet]
+                    path_states.reverse()
+                    meet = parents[1][child_state]
+                    while meet is not None:
+                        path_states.append(meet)
+                        meet = parents[1][meet]
+                    return path_states, nodes_expanded_count
+                next_frontier.append(child_state)
+        frontiers[side][:] = next_frontier
+        if len(parents[0]) + len(parents[1]) > max_states:
+            return None, nodes_expanded_count
+    return None, nodes_expanded_count
+
+def get_inversions_count(arr: Sequence[int]) -> int:
+    # Number of pairs i < j with arr[i] > arr[j], counted with a Fenwick tree in O(n log n):
+    # scanning from the right, each value adds how many smaller values were already seen.
+    # Any integers work (negative, large or repeated): values are first replaced by their
+    # rank 1..k among the distinct values, so the tree has k + 1 slots.
+    ranks = {value: rank for rank, value in enumerate(sorted(set(arr)), 1)}
+    tree = [0] * (len(ranks) + 1) # 1-based Fenwick tree over the ranks
+    inversions = 0
+    for value in reversed(arr):
+        i = ranks[value] - 1 # Counts the values < value seen so far
+        while i > 0:
+            inversions += tree[i]
+            i -= i & -i
+        i = ranks[value]
+        while i < len(tree):
+            tree[i] += 1
+            i += i & -i
+    return inversions
+
+def get_empty_tile_row_from_bottom(state_tuple: Board) -> int:
+    # 1-based row of the (single) empty tile, counted from the bottom
+    for r in range(len(state_tuple) - 1, -1, -1):
+        if 0 in state_tuple[r]:
+            return len(state_tuple) - r
+    return 0
+
+def is_solvable_standard(initial_state_tuple: Board, goal_state_tuple: Board) -> bool:
+    # Standard single-blank rule for a board of even width: a move never changes the
+    # parity of (inversions + blank row from bottom), so both states must share it.
+    def parity(state_tuple: Board) -> int:
+        tiles = [tile for row in state_tuple for tile in row if tile != 0]
+        return (get_inversions_count(tiles) + get_empty_tile_row_from_bottom(state_tuple)) % 2
+    return parity(initial_state_tuple) == parity(goal_state_tuple)
+
+def solve_15_puzzle(initial_state_list: Sequence[Sequence[int]],
+                    goal_state_list: Sequence[Sequence[int]]) -> Tuple[Optional[List[Board]], int, int]: # Renaming to solve_puzzle might be better
     initial_state_tuple = tuple(tuple(row) for row in initial_state_list)
     goal_state_tuple = tuple(tuple(row) for row in goal_state_list)
+    # Tiles are packed into 4-bit fields (pack_state) and index 16-entry tables
+    for state_tuple in (initial_state_tuple, goal_state_tuple):
+        if any(not 0 <= tile_value <= 15 for row in state_tuple for tile_value in row):
+            raise ValueError("棋子编号必须在 0~15 之间 (0 表示空格): %s" % (state_tuple,))
+        # Every heuristic maps a tile to one goal cell, so with a repeated tile h never
+        # reaches 0 and IDA* would not terminate
+        numbered_tiles = [tile_value for row in state_tuple for tile_value in row if tile_value != 0]
+        if len(set(numbered_tiles)) != len(numbered_tiles):
+            raise ValueError("除空格 (0) 外棋子编号不能重复: %s" % (state_tuple,))
 
-    goal_positions_map = {}
+    goal_positions_map: GoalMap = {}
     for r_idx, row_val in enumerate(goal_state_tuple):
         for c_idx, tile_val in enumerate(row_val):
             if tile_val != 0: # Only map numbered tiles
                 goal_positions_map[tile_val] = (r_idx, c_idx)
 
-    start_node = PuzzleNode(initial_state_tuple, g_cost=0, goal_state_map=goal_positions_map)
-
-    if start_node.state == goal_state_tuple:
+    if initial_state_tuple == goal_state_tuple:
         return [initial_state_tuple], 0, 0 # Path_states, nodes_expanded, num_moves
 
-    open_set_heap = []
-    heapq.heappush(open_set_heap, start_node)
-    open_set_g_costs = {start_node.state: start_node.g_cost}
-    closed_set = set() 
-    nodes_expanded_count = 0
+    initial_flat = [tile for row in initial_state_tuple for tile in row]
+    goal_flat = [tile for row in goal_state_tuple for tile in row]
+    # IDA* never terminates on an unsolvable instance, so rule those out first.
+    # With two (or more) empty tiles every arrangement of the same tiles is reachable;
+    # with a single one only half of them are.
+    if sorted(initial_flat) != sorted(goal_flat):
+        return None, 0, -1
+    if initial_flat.count(0) == 1 and not is_solvable_standard(initial_state_tuple, goal_state_tuple):
+        return None, 0, -1
 
-    while open_set_heap:
-        current_node = heapq.heappop(open_set_heap)
+    # Shallow instances are solved without building the heuristic tables at all, unless
+    # an earlier solve or run already built them for this goal
+    bfs_expanded_count = 0 # Also counted when the BFS gives up and IDA* takes over
+    manhattan_table = build_manhattan_table(goal_positions_map)
+    if (not pattern_databases_ready(goal_positions_map) and
+            calculate_manhattan_distance(pack_state(initial_state_tuple), manhattan_table) <= BIDIRECTIONAL_MAX_ESTIMATE):
+        path_states, bfs_expanded_count = bidirectional_bfs(pack_state(initial_state_tuple), pack_state(goal_state_tuple))
+        if path_states is not None:
+            return [unpack_state(state) for state in path_states], bfs_expanded_count, len(path_states) - 1
 
-        if current_node.state in closed_set:
-            continue 
-        
-        closed_set.add(current_node.state)
-        nodes_expanded_count += 1
+    pattern_dbs = build_pattern_databases(goal_positions_map)
+    walking_distance = build_walking_distance(goal_positions_map)
+
+    # The optional compiled search (needs numba + numpy) is only imported here, so that
+    # inputs solved before this point don't pay for loading it
+    try:
+        import solver_numba
+    except ImportError:
+        solver_numba = None # type: ignore[assignment]
+    if solver_numba is not None:
+        # Same IDA* search, compiled with Numba over a flat int8 board
+        moves, nodes_expanded_count = solver_numba.solve(initial_flat, goal_flat, (NEIGHBORS, LINES, LINE_CONFLICT_COST),
+                                                         (TT_SIZE_BITS, ZOBRIST_KEYS, ZOBRIST_MOVE_KEYS),
+                                                         pattern_dbs, walking_distance)
+        nodes_expanded_count += bfs_expanded_count
+        if moves is None:
+            return None, nodes_expanded_count, -1
+        path_boards = [initial_state_tuple]
+        for from_idx, to_idx in moves:
+            initial_flat[to_idx], initial_flat[from_idx] = initial_flat[from_idx], 0
+            path_boards.append(tuple(tuple(initial_flat[r * 4:r * 4 + 4]) for r in range(4)))
+        return path_boards, nodes_expanded_count, len(moves)
+
+    path_states, nodes_expanded_count = ida_star(pack_state(initial_state_tuple), goal_positions_map, pattern_dbs, walking_distance)
+    nodes_expanded_count += bfs_expanded_count
+    if path_states is None:
+        return None, nodes_expanded_count, -1
+    return [unpack_state(state) for state in path_states], nodes_expanded_count, len(path_states) - 1
 
-        if current_node.state == goal_state_tuple:
-            path_states = []
-            temp = current_node
-            while temp: 
-                path_states.append(temp.state)
-                temp = temp.parent
-            return path_states[::-1], nodes_expanded_count, len(path_states) - 1
-
-        for neighbor_node in current_node.get_neighbors():
-            if neighbor_node.state in closed_set:
-                continue
-
-            if neighbor_node.g_cost < open_set_g_costs.get(neighbor_node.state, float('inf')):
-                open_set_g_costs[neighbor_node.state] = neighbor_node.g_cost
-                heapq.heappush(open_set_heap, neighbor_node)
-            
-    return None, nodes_expanded_count, -1
-
-def read_puzzle_from_input():
-    initial_state_list = []
-    goal_state_list = []
-    for _ in range(4):
-        initial_state_list.append(list(map(int, input().split())))
-    for _ in range(4):
-        goal_state_list.append(list(map(int, input().split())))
+def read_puzzle_from_input() -> Tuple[List[List[int]], List[List[int]]]:
+    # The initial and goal boards are the first 32 numbers on stdin, read in one call.
+    # Anything after them is ignored, so a file may carry trailing notes.
+    tokens = sys.stdin.read().split()
+    if len(tokens) < 32:
+        raise ValueError("输入格式错误: 需要 32 个整数 (初始状态与目标状态各 4×4)，只读到 %d 个" % len(tokens))
+    values = [int(token) for token in tokens[:32]]
+    initial_state_list = [values[r * 4:r * 4 + 4] for r in range(4)]
+    goal_state_list = [values[r * 4:r * 4 + 4] for r in range(4, 8)]
     return initial_state_list, goal_state_list
 
-def print_board(state_tuple):
+def print_board(state_tuple: Optional[Board]) -> None:
     if state_tuple is None:
         print("状态为 None")
         return
-    for row in state_tuple:
-        print(" ".join(str(tile if tile != 0 else '.').rjust(3) for tile in row))
-    print("-" * 15)
+    # One formatted string (and one write) per board
+    print("\n".join("%3s %3s %3s %3s" % tuple(tile if tile != 0 else '.' for tile in row) for row in state_tuple)
+          + "\n" + "-" * 15)
 
-def main():
+def main() -> None:
     initial_state_list, goal_state_list = read_puzzle_from_input()
     
-    print("14数码问题 A* 算法求解器")
+    print("14数码问题 IDA* 算法求解器")
     print(f"--- 正在解决: 14数码问题 ---")
     print("初始状态:")
     print_board(tuple(tuple(r) for r in initial_state_list))
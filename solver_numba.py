@@ -0,0 +1,297 @@
+import numpy as np
+from numba import njit, types
+from numba.typed import List
+
+FOUND = -1 # Sentinel returned by the depth-first search once the goal is reached
+INF = 1 << 30 # Larger than any reachable f-cost
+
+@njit(cache=True)
+def manhattan(board, manhattan_table):
+    distance = 0
+    for idx in range(16):
+        distance += manhattan_table[board[idx], idx]
+    return distance
+
+@njit(cache=True)
+def line_conflict(board, goal_pos, line_cells, line_conflict_table, line_idx):
+    # Linear conflict cost of row line_idx (< 4) or column line_idx - 4 (>= 4)
+    code = 0
+    weight = 1
+    for k in range(4):
+        tile_value = board[line_cells[line_idx, k]]
+        if tile_value != 0:
+            goal_idx = goal_pos[tile_value]
+            if line_idx < 4 and goal_idx // 4 == line_idx:
+                code += (goal_idx % 4 + 1) * weight
+                weight *= 5
+            elif line_idx >= 4 and goal_idx % 4 == line_idx - 4:
+                code += (goal_idx // 4 + 1) * weight
+                weight *= 5
+    return line_conflict_table[code]
+
+@njit(cache=True)
+def heuristic(board, goal_pos, manhattan_table, line_cells, line_conflict_table):
+    h_cost = manhattan(board, manhattan_table)
+    for line_idx in range(8):
+        h_cost += line_conflict(board, goal_pos, line_cells, line_conflict_table, line_idx)
+    return h_cost
+
+@njit(cache=True)
+def pdb_indices(board, tile_group, tile_shift, n_groups):
+    # Table index of every pattern database, see build_pdb in fifteen_puzzle_solver
+    indices = np.zeros(n_groups, dtype=np.int64)
+    for idx in range(16):
+        group_idx = tile_group[board[idx]]
+        if group_idx >= 0:
+            indices[group_idx] |= idx << tile_shift[board[idx]]
+    return indices
+
+@njit(cache=True)
+def walking_distance(wd_keys, wd_table_keys, wd_table_costs):
+    # Row plus column walking distance of the keys wd_keys = (row key, column key)
+    return (wd_table_costs[0, np.searchsorted(wd_table_keys[0], wd_keys[0])]
+            + wd_table_costs[1, np.searchsorted(wd_table_keys[1], wd_keys[1])])
+
+@njit(cache=True)
+def zobrist_hash(board, zobrist_keys):
+    state_hash = np.uint64(0)
+    for idx in range(16):
+        if board[idx] != 0:
+            state_hash ^= zobrist_keys[board[idx] * 16 + idx]
+    return state_hash
+
+@njit(cache=True)
+def ida_search(board, neighbor_table, line_cells, line_conflict_table, goal_pos, manhattan_table, pdbs,
+               tile_group, tile_shift, wd_units, wd_table_keys, wd_table_costs, zobrist_keys,
+               zobrist_move_keys, tt_keys, tt_bounds, bound, path, expanded):
+    # One IDA* iteration, written as an explicit-stack DFS (Numba cannot cache
+    # recursive functions). Returns FOUND, leaving the moves in path, or the
+    # smallest f-cost that exceeded bound.
+    # h = max(Manhattan + linear conflict, sum of the pattern databases, walking distance),
+    # raised by the transposition table (see fifteen_puzzle_solver.ida_star)
+    mdlc_stack = np.empty(bound + 2, dtype=np.int32) # Manhattan + linear conflict at each depth
+    pdb_stack = np.empty(bound + 2, dtype=np.int32) # Pattern database sum at each depth
+    wd_stack = np.empty(bound + 2, dtype=np.int32) # Walking distance at each depth
+    wd_key_stack = np.zeros((bound + 2, 2), dtype=np.int64) # Walking distance (row, column) keys at each depth
+    next_move = np.empty(bound + 2, dtype=np.int32) # Next (empty_idx * 4 + neighbor slot) to try, -1 if unvisited
+    min_f_stack = np.empty(bound + 2, dtype=np.int32) # Smallest f that exceeded bound below each depth
+    hash_stack = np.empty(bound + 2, dtype=np.uint64) # Zobrist hash of the state at each depth
+    key_stack = np.empty(bound + 2, dtype=np.uint64) # Its transposition table key
+    pdb_index = pdb_indices(board, tile_group, tile_shift, pdbs.shape[0]) # Updated in place on each move
+    mdlc_stack[0] = heuristic(board, goal_pos, manhattan_table, line_cells, line_conflict_table)
+    pdb_stack[0] = 0
+    for group_idx in range(pdbs.shape[0]):
+        pdb_stack[0] += pdbs[group_idx, pdb_index[group_idx]]
+    for idx in range(16):
+        wd_key_stack[0, 0] += wd_units[0, board[idx], idx]
+        wd_key_stack[0, 1] += wd_units[1, board[idx], idx]
+    wd_stack[0] = walking_distance(wd_key_stack[0], wd_table_keys, wd_table_costs)
+    tt_mask = np.uint64(tt_keys.shape[0] - 1) # The table size is a power of two
+    hash_stack[0] = zobrist_hash(board, zobrist_keys)
+    key_stack[0] = hash_stack[0]
+    next_move[0] = -1
+    depth = 0
+
+    while True:
+        backtrack = False
+        result = INF # Value the node at depth reports to its parent when backtracking
+        if next_move[depth] == -1:
+            h_cost = max(mdlc_stack[depth], pdb_stack[depth], wd_stack[depth])
+            slot = np.int64(key_stack[depth] & tt_mask)
+            if tt_keys[slot] == key_stack[depth] and tt_bounds[slot] > h_cost:
+                h_cost = np.int32(tt_bounds[slot])
+            f_cost = depth + h_cost
+            if f_cost > bound:
+                result = f_cost
+                backtrack = True
+            elif h_cost == 0: # Every tile is on its goal cell
+                return FOUND
+            else:
+                expanded[0] += 1
+                next_move[depth] = 0
+                min_f_stack[depth] = INF
+
+        if not backtrack:
+            backtrack = True
+            while next_move[depth] < 64: # Same blank/move order as fifteen_puzzle_solver.ida_star
+                empty_idx = next_move[depth] >> 2
+                tile_idx = neighbor_table[empty_idx, next_move[depth] & 3]
+                next_move[depth] += 1
+                if board[empty_idx] != 0 or tile_idx < 0: # Not a blank, or no more neighbors
+                    next_move[depth] = (empty_idx + 1) * 4
+                    continue
+
+                tile_value = board[tile_idx]
+                if tile_value == 0:
+                    continue
+                if depth > 0 and path[-1] == empty_idx * 16 + tile_idx: # Would undo the last move
+                    continue
+
+                # Only the two rows (vertical move) or two columns (horizontal move)
+                # the tile moves between change their linear conflict
+                if tile_idx // 4 == empty_idx // 4:
+                    line_a, line_b = 4 + tile_idx % 4, 4 + empty_idx % 4
+                else:
+                    line_a, line_b = tile_idx // 4, empty_idx // 4
+                child_mdlc = (mdlc_stack[depth] - manhattan_table[tile_value, tile_idx]
+                              + manhattan_table[tile_value, empty_idx]
+                              - line_conflict(board, goal_pos, line_cells, line_conflict_table, line_a)
+                              - line_conflict(board, goal_pos, line_cells, line_conflict_table, line_b))
+                board[empty_idx] = tile_value
+                board[tile_idx] = 0
+                child_mdlc += (line_conflict(board, goal_pos, line_cells, line_conflict_table, line_a)
+                               + line_conflict(board, goal_pos, line_cells, line_conflict_table, line_b))
+
+                # Only the moved tile's pattern database changes
+                child_pdb = pdb_stack[depth]
+                group_idx = tile_group[tile_value]
+                if group_idx >= 0:
+                    child_pdb -= pdbs[group_idx, pdb_index[group_idx]]
+                    pdb_index[group_idx] += (empty_idx - tile_idx) << tile_shift[tile_value]
+                    child_pdb += pdbs[group_idx, pdb_index[group_idx]]
+
+                path.append(np.int16(tile_idx * 16 + empty_idx))
+                depth += 1
+                mdlc_stack[depth] = child_mdlc
+                pdb_stack[depth] = child_pdb
+                for k in range(2): # A vertical move only changes the row key, a horizontal one the column key
+                    wd_key_stack[depth, k] = (wd_key_stack[depth - 1, k] + wd_units[k, tile_value, empty_idx]
+                                              - wd_units[k, tile_value, tile_idx])
+                wd_stack[depth] = walking_distance(wd_key_stack[depth], wd_table_keys, wd_table_costs)
+                hash_stack[depth] = (hash_stack[depth - 1] ^ zobrist_keys[tile_value * 16 + tile_idx]
+                                     ^ zobrist_keys[tile_value * 16 + empty_idx])
+                key_stack[depth] = hash_stack[depth] ^ zobrist_move_keys[tile_idx * 16 + empty_idx]
+                next_move[depth] = -1
+                backtrack = False
+                break
+            if backtrack: # Every move searched without reaching the goal
+                result = min_f_stack[depth]
+                if result < INF:
+                    slot = np.int64(key_stack[depth] & tt_mask)
+                    tt_keys[slot] = key_stack[depth]
+                    tt_bounds[slot] = min(result - depth, 255)
+
+        if backtrack:
+            if depth == 0:
+                return result
+            move = np.int64(path.pop())
+            from_idx, to_idx = move // 16, move % 16
+            tile_value = board[to_idx]
+            board[from_idx] = tile_value
+            board[to_idx] = 0
+            group_idx = tile_group[tile_value]
+            if group_idx >= 0:
+                pdb_index[group_idx] -= (to_idx - from_idx) << tile_shift[tile_value]
+            depth -= 1
+            if result < min_f_stack[depth]:
+                min_f_stack[depth] = result
+
+def _board_arrays(board_tables):
+    # board_tables: (NEIGHBORS, LINES, LINE_CONFLICT_COST) from fifteen_puzzle_solver.
+    # Returns them as (neighbor_table, line_cells, line_conflict_table):
+    # neighbor_table[i] lists the cells adjacent to cell i, padded with -1; line_cells[k]
+    # the cells of line k; line_conflict_table[code] the linear conflict cost of one
+    # line, where code packs the goal coordinates along the line of the tiles that
+    # belong to it as base-5 digits, coord + 1.
+    neighbors, lines, line_conflict_cost = board_tables
+    neighbor_table = np.full((16, 4), -1, dtype=np.int8)
+    for idx, adjacent in enumerate(neighbors):
+        neighbor_table[idx, :len(adjacent)] = adjacent
+    line_cells = np.array(lines, dtype=np.int8)
+    line_conflict_table = np.zeros(5 ** 4, dtype=np.int32)
+    for goal_coords, cost in line_conflict_cost.items():
+        line_conflict_table[sum((coord + 1) * 5 ** k for k, coord in enumerate(goal_coords))] = cost
+    return neighbor_table, line_cells, line_conflict_table
+
+# Arrays derived from the goal and its pattern databases, shared by every solve in
+# this process (see _goal_arrays)
+_GOAL_ARRAYS_CACHE = {}
+
+def _goal_arrays(goal_flat, pattern_dbs, walking_distance_tables):
+    # Returns (goal_pos, manhattan_table, pdbs, tile_group, tile_shift, wd_units,
+    # wd_table_keys, wd_table_costs):
+    # goal_pos[tile_value] is the flat goal index of the tile; manhattan_table[tile_value, idx]
+    # its Manhattan distance from cell idx (0 for the empty tiles); pdbs[group_idx] is one
+    # database, zero padded to the largest table size; tile_group/tile_shift locate a
+    # tile inside its group's table index (-1: no group). wd_units[0]/wd_units[1] are the
+    # row/column units of fifteen_puzzle_solver.build_walking_distance, and row [0]/[1] of
+    # wd_table_keys/wd_table_costs the row/column table as sorted keys and their costs,
+    # padded with the largest int64.
+    goal_key = (tuple(goal_flat), pattern_dbs is not None, walking_distance_tables is not None)
+    if goal_key in _GOAL_ARRAYS_CACHE:
+        return _GOAL_ARRAYS_CACHE[goal_key]
+
+    goal_pos = np.zeros(16, dtype=np.int8)
+    for idx, tile_value in enumerate(goal_flat):
+        if tile_value != 0:
+            goal_pos[tile_value] = idx
+    manhattan_table = np.zeros((16, 16), dtype=np.uint8)
+    for tile_value in range(1, 16):
+        if tile_value in goal_flat:
+            for idx in range(16):
+                manhattan_table[tile_value, idx] = (abs(idx // 4 - goal_pos[tile_value] // 4)
+                                                    + abs(idx % 4 - goal_pos[tile_value] % 4))
+
+    tile_group = np.full(16, -1, dtype=np.int8)
+    tile_shift = np.zeros(16, dtype=np.int8)
+    if pattern_dbs is None:
+        pdbs = np.zeros((0, 1), dtype=np.uint8)
+    else:
+        tile_slots, pdb_tables = pattern_dbs
+        pdbs = np.zeros((len(pdb_tables), max(len(pdb) for pdb in pdb_tables)), dtype=np.uint8)
+        for group_idx, pdb in enumerate(pdb_tables):
+            pdbs[group_idx, :len(pdb)] = np.frombuffer(pdb, dtype=np.uint8)
+        for tile_value, (group_idx, shift) in tile_slots.items():
+            tile_group[tile_value] = group_idx
+            tile_shift[tile_value] = shift
+
+    wd_units = np.zeros((2, 16, 16), dtype=np.int64)
+    if walking_distance_tables is None: # Every key stays 0
+        wd_table_keys = np.zeros((2, 1), dtype=np.int64)
+        wd_table_costs = np.zeros((2, 1), dtype=np.uint8)
+    else:
+        row_units, col_units, row_table, col_table = walking_distance_tables
+        wd_units[0] = np.array(row_units, dtype=np.int64).reshape(16, 16)
+        wd_units[1] = np.array(col_units, dtype=np.int64).reshape(16, 16)
+        table_size = max(len(row_table), len(col_table))
+        wd_table_keys = np.full((2, table_size), np.iinfo(np.int64).max, dtype=np.int64)
+        wd_table_costs = np.zeros((2, table_size), dtype=np.uint8)
+        for k, table in enumerate((row_table, col_table)):
+            keys = sorted(table)
+            wd_table_keys[k, :len(keys)] = keys
+            wd_table_costs[k, :len(keys)] = [table[key] for key in keys]
+
+    _GOAL_ARRAYS_CACHE[goal_key] = (goal_pos, manhattan_table, pdbs, tile_group, tile_shift,
+                                    wd_units, wd_table_keys, wd_table_costs)
+    return _GOAL_ARRAYS_CACHE[goal_key]
+
+def solve(initial_flat, goal_flat, board_tables, transposition, pattern_dbs=None, walking_distance_tables=None):
+    # initial_flat/goal_flat: 16 tile values in row-major order, same tile multiset.
+    # board_tables: (NEIGHBORS, LINES, LINE_CONFLICT_COST) from fifteen_puzzle_solver.
+    # transposition: (TT_SIZE_BITS, ZOBRIST_KEYS, ZOBRIST_MOVE_KEYS) from fifteen_puzzle_solver,
+    # so that both searches use the same keys and table size and expand the same nodes.
+    # pattern_dbs: (tile_slots, pdbs) from fifteen_puzzle_solver.build_pattern_databases.
+    # walking_distance_tables: from fifteen_puzzle_solver.build_walking_distance.
+    # Returns ([(from_idx, to_idx), ...], nodes_expanded), or (None, nodes_expanded).
+    board = np.array(initial_flat, dtype=np.int8)
+    neighbor_table, line_cells, line_conflict_table = _board_arrays(board_tables)
+    (goal_pos, manhattan_table, pdbs, tile_group, tile_shift,
+     wd_units, wd_table_keys, wd_table_costs) = _goal_arrays(goal_flat, pattern_dbs, walking_distance_tables)
+
+    path = List.empty_list(types.int16)
+    expanded = np.zeros(1, dtype=np.int64)
+    tt_size_bits, zobrist_keys, zobrist_move_keys = transposition
+    zobrist_keys = np.array(zobrist_keys, dtype=np.uint64)
+    zobrist_move_keys = np.array(zobrist_move_keys, dtype=np.uint64)
+    tt_keys = np.zeros(1 << tt_size_bits, dtype=np.uint64) # Kept across iterations
+    tt_bounds = np.zeros(1 << tt_size_bits, dtype=np.uint8)
+    threshold = 0 # Raised to h(start) by the first iteration
+    while True:
+        t = ida_search(board, neighbor_table, line_cells, line_conflict_table, goal_pos, manhattan_table, pdbs,
+                       tile_group, tile_shift, wd_units, wd_table_keys, wd_table_costs, zobrist_keys,
+                       zobrist_move_keys, tt_keys, tt_bounds, threshold, path, expanded)
+        if t == FOUND:
+            return [divmod(int(move), 16) for move in path], int(expanded[0])
+        if t >= INF:
+            return None, int(expanded[0])
+        threshold = t